@@ -5,34 +5,70 @@ A super simple FastAPI application that allows students to view and sign up
 for extracurricular activities at Mergington High School.
 """
 
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, status
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
-from fastapi.security import OAuth2AuthorizationCodeBearer, OAuth2PasswordBearer
+from fastapi.responses import RedirectResponse, Response
+from fastapi.openapi.utils import get_openapi
 from pydantic import BaseModel
+import hashlib
+import json
 import os
 import re
-import operator
-from typing import Dict, List, Callable, Union, Optional
+import secrets
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Annotated, Dict, List, Callable, Union, Optional, Set, Tuple
 from pathlib import Path
 
+# Opcodes produced by the Calculator tokenizer
+OP_ADD, OP_SUB, OP_MUL, OP_DIV, OP_NUMBER, OP_LPAREN, OP_RPAREN = range(7)
+
+_OPCODES = {'+': OP_ADD, '-': OP_SUB, '*': OP_MUL, '/': OP_DIV,
+            '(': OP_LPAREN, ')': OP_RPAREN}
+
+# Tokenizer lookup table indexed by ord(char) for ASCII characters.
+# Operators and parentheses map to their opcode, digits and '.' map to
+# OP_NUMBER and anything else maps to _INVALID. Every class other than the
+# binary operators has bit 2 set, so OR-ing two classes yields a value
+# below OP_NUMBER only when both characters are binary operators.
+_INVALID = 0xFF
+_CLASS = bytearray([_INVALID]) * 128
+for _char, _opcode in _OPCODES.items():
+    _CLASS[ord(_char)] = _opcode
+for _char in '0123456789.':
+    _CLASS[ord(_char)] = OP_NUMBER
+_CLASS = bytes(_CLASS)
+del _char, _opcode
+
+# Deletion table used to strip ASCII whitespace from expressions
+_WS_TABLE = str.maketrans('', '', ' \t\n\r')
+
+# Tokenizer pattern. Each match is either a numeric literal (e.g. "3",
+# "3.", "3.25" or ".25") in the first group or a single other character
+# in the second, so findall() splits a whole expression in one C-level pass.
+_TOKEN_RE = re.compile(r'([0-9]+(?:\.[0-9]*)?|\.[0-9]+)|(.)', re.DOTALL)
+
 class Calculator:
     """
     An efficient calculator class that evaluates mathematical expressions.
     Supports basic arithmetic operations: +, -, *, /, (, and ).
+    The class holds no per-instance state, so a single shared instance
+    (CALCULATOR) can serve every request.
     """
-    def __init__(self):
-        self.operations = {
-            '+': operator.add,
-            '-': operator.sub,
-            '*': operator.mul,
-            '/': operator.truediv
-        }
-    
     def calculate(self, expression: str) -> float:
         """
-        Efficiently calculates the result of a mathematical expression using
-        the Shunting Yard algorithm to handle operator precedence.
+        Efficiently calculates the result of a mathematical expression.
+        The expression is tokenized into opcodes and then evaluated in a
+        single left-to-right pass over this grammar:
+        
+            expr   := term (('+' | '-') term)*
+            term   := factor (('*' | '/') factor)*
+            factor := number | '(' expr ')'
+        
+        Parentheses are handled with an explicit stack rather than
+        recursion, so nesting depth is limited only by expression length.
         
         Args:
             expression: A string containing a mathematical expression
@@ -43,103 +79,161 @@ class Calculator:
         Raises:
             ValueError: If the expression is invalid
         """
-        # Remove all spaces
-        expression = expression.replace(' ', '')
+        # Remove all whitespace
+        expression = expression.translate(_WS_TABLE)
         
         # Check if expression is empty
         if not expression:
             return 0
             
-        # Validate the expression format
-        # Check for consecutive operators which are invalid (e.g., "3++4")
-        for i in range(len(expression) - 1):
-            if (expression[i] in self.operations and 
-                expression[i+1] in self.operations):
-                raise ValueError(f"Invalid expression: consecutive operators {expression[i]}{expression[i+1]}")
+        # The character class table only covers ASCII
+        if not expression.isascii():
+            char = next(c for c in expression if not c.isascii())
+            raise ValueError(f"Unknown character in expression: {char}")
         
-        # Define operator precedence
-        precedence = {'+': 1, '-': 1, '*': 2, '/': 2}
+        opcodes, operands = self._tokenize(expression)
+        return self._evaluate(opcodes, operands)
+    
+    def _tokenize(self, expression: str) -> Tuple[List[int], List[float]]:
+        """
+        Split an ASCII expression into opcodes and the values of its
+        OP_NUMBER tokens, in order. The regex yields whole tokens and each
+        non-number token is classified with a single table lookup.
+        """
+        classes = _CLASS
+        opcodes = []
+        operands = []
+        # Bound methods, looked up once rather than per token
+        add_opcode = opcodes.append
+        add_operand = operands.append
         
-        # Initialize stacks for operators and values
-        operators = []
-        values = []
+        # Class of the previous token, used to reject consecutive operators
+        last = _INVALID
+        previous_number = ''
         
-        i = 0
-        try:
-            while i < len(expression):
-                char = expression[i]
-                
-                # Handle numbers (including decimals)
-                if char.isdigit() or char == '.':
-                    num = ''
-                    while i < len(expression) and (expression[i].isdigit() or expression[i] == '.'):
-                        num += expression[i]
-                        i += 1
-                    try:
-                        values.append(float(num))
-                    except ValueError:
-                        raise ValueError(f"Invalid number format: {num}")
+        for number, char in _TOKEN_RE.findall(expression):
+            # Handle numbers (including decimals). A literal with several
+            # points (e.g., "1.2.3") scans as back-to-back numbers.
+            if number:
+                if last == OP_NUMBER:
+                    raise ValueError(f"Invalid number format: {previous_number}{number}")
+                add_operand(float(number))
+                add_opcode(OP_NUMBER)
+                last = OP_NUMBER
+                previous_number = number
+                continue
+            
+            kind = classes[ord(char)]
+            
+            # A '.' that is not part of a numeric literal
+            if kind == OP_NUMBER:
+                prefix = previous_number if last == OP_NUMBER else ''
+                raise ValueError(f"Invalid number format: {prefix}{char}")
+            
+            if kind == _INVALID:
+                raise ValueError(f"Unknown character in expression: {char}")
+            
+            # Consecutive operators are invalid (e.g., "3++4")
+            if last | kind < OP_NUMBER:
+                raise ValueError(f"Invalid expression: consecutive operators {'+-*/'[last]}{char}")
+            
+            # Operators and parentheses are their own opcode
+            add_opcode(kind)
+            last = kind
+        
+        return opcodes, operands
+    
+    def _evaluate(self, opcodes: List[int], operands: List[float]) -> float:
+        """
+        Evaluate tokenized opcodes, consuming operands in order.
+        
+        Each parenthesis level keeps the sum of its completed terms, the
+        pending '+'/'-', the current term and the pending '*'/'/'. Opening
+        a parenthesis saves that state on a stack and closing one turns the
+        inner result into an operand of the outer level.
+        """
+        stack = []
+        total = 0.0
+        add_op = None   # None until the level's first term is complete
+        term = 0.0
+        mul_op = None   # None until the term's first factor is read
+        expect_operand = True
+        next_operand = 0
+        
+        for op in opcodes:
+            if op == OP_NUMBER or op == OP_LPAREN:
+                if not expect_operand:
+                    raise ValueError("Invalid expression")
+                if op == OP_LPAREN:
+                    stack.append((total, add_op, term, mul_op))
+                    add_op = None
+                    mul_op = None
+                    continue
+                value = operands[next_operand]
+                next_operand += 1
+            else:
+                if expect_operand:
+                    raise ValueError("Invalid expression: missing operand")
+                if op == OP_MUL or op == OP_DIV:
+                    mul_op = op
+                    expect_operand = True
                     continue
                 
-                # Handle parentheses
-                elif char == '(':
-                    operators.append(char)
-                elif char == ')':
-                    while operators and operators[-1] != '(':
-                        self._apply_operator(operators, values)
-                    if operators and operators[-1] == '(':
-                        operators.pop()  # Remove the '('
-                    else:
-                        raise ValueError("Mismatched parentheses")
-                
-                # Handle operators
-                elif char in self.operations:
-                    while (operators and operators[-1] != '(' and 
-                        operators[-1] in precedence and 
-                        precedence.get(char, 0) <= precedence.get(operators[-1], 0)):
-                        self._apply_operator(operators, values)
-                    operators.append(char)
+                # '+', '-' and ')' complete the current term
+                if add_op is None:
+                    total = term
+                elif add_op == OP_ADD:
+                    total += term
                 else:
-                    raise ValueError(f"Unknown character in expression: {char}")
+                    total -= term
                 
-                i += 1
-            
-            # Apply remaining operators
-            while operators:
-                op = operators[-1]
-                if op == '(' or op == ')':
-                    raise ValueError("Mismatched parentheses")
-                self._apply_operator(operators, values)
-                
-            # The result should be the only value left in the values stack
-            if len(values) != 1:
-                raise ValueError("Invalid expression")
-                
-            return values[0]
-            
-        except (IndexError, ZeroDivisionError) as e:
-            if isinstance(e, ZeroDivisionError):
-                raise
-            raise ValueError("Invalid expression format")
-    
-    def _apply_operator(self, operators: List[str], values: List[float]) -> None:
-        """Apply the top operator to the top two values on the values stack"""
-        if not operators:
-            raise ValueError("Invalid expression: missing operator")
-            
-        operator = operators.pop()
-        if operator in self.operations:
-            if len(values) < 2:
-                raise ValueError("Invalid expression: not enough values for operation")
+                if op != OP_RPAREN:
+                    add_op = op
+                    mul_op = None
+                    expect_operand = True
+                    continue
                 
-            right = values.pop()
-            left = values.pop()
+                # ')' makes the inner result an operand of the outer level
+                if not stack:
+                    raise ValueError("Mismatched parentheses")
+                value = total
+                total, add_op, term, mul_op = stack.pop()
             
-            # Handle division by zero explicitly
-            if operator == '/' and right == 0:
-                raise ZeroDivisionError("Division by zero")
-                
-            values.append(self.operations[operator](left, right))
+            # Fold the operand into the current term
+            if mul_op is None:
+                term = value
+            elif mul_op == OP_MUL:
+                term *= value
+            else:
+                # Handle division by zero explicitly
+                if value == 0:
+                    raise ZeroDivisionError("Division by zero")
+                term /= value
+            expect_operand = False
+        
+        if expect_operand:
+            raise ValueError("Invalid expression: missing operand")
+        if stack:
+            raise ValueError("Mismatched parentheses")
+        
+        if add_op is None:
+            return term
+        if add_op == OP_ADD:
+            return total + term
+        return total - term
+
+
+# Shared calculator instance
+CALCULATOR = Calculator()
+
+
+@lru_cache(maxsize=4096)
+def _calc_cached(expr_nospace: str) -> float:
+    """
+    Evaluate a whitespace-free expression, memoizing successful results.
+    Errors are not cached, so invalid expressions raise on every call.
+    """
+    return CALCULATOR.calculate(expr_nospace)
 
 
 # User model for authentication
@@ -147,122 +241,214 @@ class User(BaseModel):
     email: str
     username: str
 
-# Global user storage
-users_db = {}
+# Lightweight record kept in users_db; FastAPI converts it to the User
+# response model when it is returned from an endpoint
+@dataclass(slots=True)
+class StoredUser:
+    email: str
+    username: str
+    expires_at: float
+
+# Access tokens expire after TOKEN_TTL_SECONDS, and at most MAX_SESSIONS
+# tokens are kept; past that the oldest is evicted
+TOKEN_TTL_SECONDS = 3600
+MAX_SESSIONS = 10000
+
+# Global user storage, keyed by token digest so raw tokens are never stored.
+# Entries are kept in issue order, which is also expiry order.
+users_db: "OrderedDict[bytes, StoredUser]" = OrderedDict()
 
-# OAuth configuration
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+def _token_key(token: str) -> bytes:
+    """Return the users_db key for an access token"""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
 
-# Dependency to get current user
-def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
-    if token not in users_db:
+# Dependency to get current user. The Bearer token is read straight from
+# the Authorization header rather than through OAuth2PasswordBearer.
+async def get_current_user(request: Request) -> StoredUser:
+    authorization = request.headers.get("authorization")
+    if not authorization or authorization[:7].lower() != "bearer ":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    key = _token_key(authorization[7:])
+    user = users_db.get(key)
+    if user is not None and user.expires_at <= time.monotonic():
+        del users_db[key]
+        user = None
+    if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return users_db[token]
+    return user
 
 app = FastAPI(title="Mergington High School API",
               description="API for viewing and signing up for extracurricular activities")
 
+# get_current_user parses the Authorization header itself, so FastAPI does
+# not know the protected endpoints use Bearer auth. Declare the scheme in
+# the OpenAPI schema only, so the /docs "Authorize" flow still works.
+BEARER_SECURITY = {"security": [{"BearerAuth": []}]}
+
+def custom_openapi():
+    if app.openapi_schema:
+        return app.openapi_schema
+    openapi_schema = get_openapi(title=app.title,
+                                 version=app.version,
+                                 description=app.description,
+                                 routes=app.routes)
+    openapi_schema.setdefault("components", {})["securitySchemes"] = {
+        "BearerAuth": {"type": "http", "scheme": "bearer"}
+    }
+    app.openapi_schema = openapi_schema
+    return app.openapi_schema
+
+app.openapi = custom_openapi
+
 # Mount the static files directory
 current_dir = Path(__file__).parent
 app.mount("/static", StaticFiles(directory=os.path.join(Path(__file__).parent,
           "static")), name="static")
 
+# Activity record. The record itself is frozen; signups only mutate the
+# participants list and the participant_set kept beside it for O(1)
+# membership checks.
+@dataclass(frozen=True, slots=True)
+class Activity:
+    description: str
+    schedule: str
+    max_participants: int
+    participants: List[str]
+    participant_set: Set[str] = field(init=False, default_factory=set)
+
+    def __post_init__(self):
+        self.participant_set.update(self.participants)
+
 # In-memory activity database
-activities = {
+activities: Dict[str, Activity] = {
     # Intellectual
-    "Chess Club": {
-        "description": "Learn strategies and compete in chess tournaments",
-        "schedule": "Fridays, 3:30 PM - 5:00 PM",
-        "max_participants": 12,
-        "participants": ["michael@mergington.edu", "daniel@mergington.edu"]
-    },
-    "Programming Class": {
-        "description": "Learn programming fundamentals and build software projects",
-        "schedule": "Tuesdays and Thursdays, 3:30 PM - 4:30 PM",
-        "max_participants": 20,
-        "participants": ["emma@mergington.edu", "sophia@mergington.edu"]
-    },
-    "Math Olympiad": {
-        "description": "Prepare for math competitions and solve challenging problems",
-        "schedule": "Wednesdays, 4:00 PM - 5:30 PM",
-        "max_participants": 15,
-        "participants": []
-    },
-    "Science Club": {
-        "description": "Explore science experiments and participate in science fairs",
-        "schedule": "Mondays, 3:30 PM - 5:00 PM",
-        "max_participants": 18,
-        "participants": []
-    },
+    "Chess Club": Activity(
+        description="Learn strategies and compete in chess tournaments",
+        schedule="Fridays, 3:30 PM - 5:00 PM",
+        max_participants=12,
+        participants=["michael@mergington.edu", "daniel@mergington.edu"]
+    ),
+    "Programming Class": Activity(
+        description="Learn programming fundamentals and build software projects",
+        schedule="Tuesdays and Thursdays, 3:30 PM - 4:30 PM",
+        max_participants=20,
+        participants=["emma@mergington.edu", "sophia@mergington.edu"]
+    ),
+    "Math Olympiad": Activity(
+        description="Prepare for math competitions and solve challenging problems",
+        schedule="Wednesdays, 4:00 PM - 5:30 PM",
+        max_participants=15,
+        participants=[]
+    ),
+    "Science Club": Activity(
+        description="Explore science experiments and participate in science fairs",
+        schedule="Mondays, 3:30 PM - 5:00 PM",
+        max_participants=18,
+        participants=[]
+    ),
     # Sports
-    "Gym Class": {
-        "description": "Physical education and sports activities",
-        "schedule": "Mondays, Wednesdays, Fridays, 2:00 PM - 3:00 PM",
-        "max_participants": 30,
-        "participants": ["john@mergington.edu", "olivia@mergington.edu"]
-    },
-    "Soccer Team": {
-        "description": "Join the school soccer team and compete in matches",
-        "schedule": "Tuesdays and Thursdays, 4:00 PM - 5:30 PM",
-        "max_participants": 22,
-        "participants": []
-    },
-    "Basketball Club": {
-        "description": "Practice basketball skills and play friendly games",
-        "schedule": "Fridays, 5:00 PM - 6:30 PM",
-        "max_participants": 20,
-        "participants": []
-    },
+    "Gym Class": Activity(
+        description="Physical education and sports activities",
+        schedule="Mondays, Wednesdays, Fridays, 2:00 PM - 3:00 PM",
+        max_participants=30,
+        participants=["john@mergington.edu", "olivia@mergington.edu"]
+    ),
+    "Soccer Team": Activity(
+        description="Join the school soccer team and compete in matches",
+        schedule="Tuesdays and Thursdays, 4:00 PM - 5:30 PM",
+        max_participants=22,
+        participants=[]
+    ),
+    "Basketball Club": Activity(
+        description="Practice basketball skills and play friendly games",
+        schedule="Fridays, 5:00 PM - 6:30 PM",
+        max_participants=20,
+        participants=[]
+    ),
     # Artistic
-    "Art Club": {
-        "description": "Explore painting, drawing, and other visual arts",
-        "schedule": "Thursdays, 3:30 PM - 5:00 PM",
-        "max_participants": 16,
-        "participants": []
-    },
-    "Drama Society": {
-        "description": "Act in plays and learn about theater production",
-        "schedule": "Wednesdays, 5:00 PM - 6:30 PM",
-        "max_participants": 14,
-        "participants": []
-    },
-    "Music Ensemble": {
-        "description": "Perform music in a group and learn new instruments",
-        "schedule": "Mondays, 4:00 PM - 5:30 PM",
-        "max_participants": 12,
-        "participants": []
-    }
+    "Art Club": Activity(
+        description="Explore painting, drawing, and other visual arts",
+        schedule="Thursdays, 3:30 PM - 5:00 PM",
+        max_participants=16,
+        participants=[]
+    ),
+    "Drama Society": Activity(
+        description="Act in plays and learn about theater production",
+        schedule="Wednesdays, 5:00 PM - 6:30 PM",
+        max_participants=14,
+        participants=[]
+    ),
+    "Music Ensemble": Activity(
+        description="Perform music in a group and learn new instruments",
+        schedule="Mondays, 4:00 PM - 5:30 PM",
+        max_participants=12,
+        participants=[]
+    )
 }
 
+# Cached /activities response body, rebuilt after a signup changes it
+_activities_json: Optional[bytes] = None
+
+
+def _activities_body() -> bytes:
+    """Return the activities serialized as JSON, rebuilding the cache if stale"""
+    global _activities_json
+    if _activities_json is None:
+        _activities_json = json.dumps(
+            {
+                name: {
+                    "description": activity.description,
+                    "schedule": activity.schedule,
+                    "max_participants": activity.max_participants,
+                    "participants": activity.participants,
+                }
+                for name, activity in activities.items()
+            },
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+    return _activities_json
+
 
 @app.get("/")
-def root():
+async def root():
     return RedirectResponse(url="/static/index.html")
 
 
 @app.get("/activities")
-def get_activities():
-    return activities
+async def get_activities():
+    return Response(content=_activities_body(), media_type="application/json")
 
 
 @app.post("/activities/{activity_name}/signup")
-def signup_for_activity(activity_name: str, email: str):
+async def signup_for_activity(activity_name: str, email: str) -> Dict[str, str]:
     """Sign up a student for an activity"""
+    global _activities_json
+
     # Validate activity exists
-    if activity_name not in activities:
+    activity = activities.get(activity_name)
+    if activity is None:
         raise HTTPException(status_code=404, detail="Activity not found")
 
-    # Get the specific activity
-    activity = activities[activity_name]
-
     # Prevent duplicate registration
-    if email in activity["participants"]:
+    if email in activity.participant_set:
         return {"error": "Student already registered for this activity."}
-    activity["participants"].append(email)
+
+    # Enforce the activity's capacity
+    if len(activity.participant_set) >= activity.max_participants:
+        raise HTTPException(status_code=409, detail="Activity is full")
+
+    activity.participants.append(email)
+    activity.participant_set.add(email)
+    _activities_json = None
     return {"message": f"Signed up {email} for {activity_name}"}
 
 # Auth token model
@@ -277,7 +463,7 @@ class LoginData(BaseModel):
 
 # Token endpoint
 @app.post("/token", response_model=Token)
-def login_for_access_token(login_data: LoginData):
+async def login_for_access_token(login_data: LoginData):
     """
     OAuth token endpoint for user authentication
     """
@@ -292,32 +478,52 @@ def login_for_access_token(login_data: LoginData):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Generate a simple token (in production use JWT or similar)
-    token = f"user-{login_data.username}-token"
+    # Generate an unguessable random token (in production use JWT or similar)
+    token = secrets.token_urlsafe(32)
+    
+    # Drop expired sessions, which sit at the front of users_db
+    now = time.monotonic()
+    while users_db and next(iter(users_db.values())).expires_at <= now:
+        users_db.popitem(last=False)
     
-    # Store user in our db
-    users_db[token] = User(email=f"{login_data.username}@mergington.edu", username=login_data.username)
+    # Store user in our db, evicting the oldest session when full
+    users_db[_token_key(token)] = StoredUser(email=f"{login_data.username}@mergington.edu",
+                                             username=login_data.username,
+                                             expires_at=now + TOKEN_TTL_SECONDS)
+    while len(users_db) > MAX_SESSIONS:
+        users_db.popitem(last=False)
     
     return {"access_token": token, "token_type": "bearer"}
 
 # User information endpoint
-@app.get("/users/me", response_model=User)
-def read_users_me(current_user: User = Depends(get_current_user)):
+@app.get("/users/me", response_model=User, openapi_extra=BEARER_SECURITY)
+async def read_users_me(current_user: StoredUser = Depends(get_current_user)):
     """
     Get current user information (requires authentication)
     """
     return current_user
 
+# Expressions accepted by /calculate. Rejecting other characters and
+# overly long input up front keeps junk out of the Calculator and bounds
+# the size of entries in the result cache.
+MAX_EXPRESSION_LENGTH = 1024
+_EXPRESSION_PATTERN = r'^[0-9+\-*/(). \t\r\n]+$'
+
+# Calculation result model
+class CalculationResult(BaseModel):
+    expression: str
+    result: float
+
 # Calculator endpoint
-@app.post("/calculate")
-def calculate_expression(expression: str, current_user: User = Depends(get_current_user)):
+@app.post("/calculate", response_model=CalculationResult, openapi_extra=BEARER_SECURITY)
+async def calculate_expression(expression: Annotated[str, Query(max_length=MAX_EXPRESSION_LENGTH, pattern=_EXPRESSION_PATTERN)],
+                               current_user: StoredUser = Depends(get_current_user)):
     """
     Calculate the result of a mathematical expression.
     Requires user to be authenticated.
     """
-    calculator = Calculator()
     try:
-        result = calculator.calculate(expression)
+        result = _calc_cached(expression.translate(_WS_TABLE))
         return {"expression": expression, "result": result}
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error calculating expression: {str(e)}")
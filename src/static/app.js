@@ -162,7 +162,11 @@ document.addEventListener("DOMContentLoaded", () => {
         resultValue.textContent = result.result;
         calculatorResult.classList.remove("hidden");
       } else {
-        resultValue.textContent = `Error: ${result.detail}`;
+        // Validation errors (422) carry a list of details
+        const detail = Array.isArray(result.detail)
+          ? result.detail.map((error) => error.msg).join("; ")
+          : result.detail;
+        resultValue.textContent = `Error: ${detail}`;
         calculatorResult.classList.remove("hidden");
       }
     } catch (error) {
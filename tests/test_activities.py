@@ -0,0 +1,78 @@
+"""
+Unit tests for the activities endpoints.
+"""
+
+import sys
+import os
+import pytest
+from fastapi.testclient import TestClient
+from pathlib import Path
+
+# Add the src directory to the path so we can import the app module
+sys.path.append(str(Path(__file__).parent.parent))
+from src.app import app
+
+# Create a test client
+client = TestClient(app)
+
+class TestActivities:
+    """Test class for activities endpoints"""
+    
+    def test_get_activities(self):
+        """Test listing activities returns every activity with its details"""
+        response = client.get("/activities")
+        assert response.status_code == 200
+        data = response.json()
+        assert "Chess Club" in data
+        assert data["Chess Club"]["max_participants"] == 12
+        assert "michael@mergington.edu" in data["Chess Club"]["participants"]
+    
+    def test_signup(self):
+        """Test signing up adds the student to the activity"""
+        response = client.post(
+            "/activities/Art Club/signup",
+            params={"email": "signup@mergington.edu"}
+        )
+        assert response.status_code == 200
+        assert response.json() == {"message": "Signed up signup@mergington.edu for Art Club"}
+        
+        participants = client.get("/activities").json()["Art Club"]["participants"]
+        assert participants.count("signup@mergington.edu") == 1
+    
+    def test_signup_duplicate(self):
+        """Test signing up twice does not register the student again"""
+        response = client.post(
+            "/activities/Chess Club/signup",
+            params={"email": "michael@mergington.edu"}
+        )
+        assert "error" in response.json()
+        
+        participants = client.get("/activities").json()["Chess Club"]["participants"]
+        assert participants.count("michael@mergington.edu") == 1
+    
+    def test_signup_unknown_activity(self):
+        """Test signing up for a missing activity returns 404"""
+        response = client.post(
+            "/activities/Underwater Basket Weaving/signup",
+            params={"email": "student@mergington.edu"}
+        )
+        assert response.status_code == 404
+    
+    def test_signup_full_activity(self):
+        """Test signing up for an activity at capacity returns 409"""
+        max_participants = client.get("/activities").json()["Drama Society"]["max_participants"]
+        for n in range(max_participants):
+            response = client.post(
+                "/activities/Drama Society/signup",
+                params={"email": f"drama{n}@mergington.edu"}
+            )
+            assert response.status_code == 200
+        
+        response = client.post(
+            "/activities/Drama Society/signup",
+            params={"email": "late@mergington.edu"}
+        )
+        assert response.status_code == 409
+        
+        participants = client.get("/activities").json()["Drama Society"]["participants"]
+        assert len(participants) == max_participants
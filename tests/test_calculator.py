@@ -63,6 +63,11 @@ class TestCalculator:
         result = self.calculator.calculate("3 + 4 * 2")
         assert result == 11
     
+    def test_tabs_and_newlines(self):
+        """Test that tabs and newlines are treated like spaces"""
+        result = self.calculator.calculate("3\t+ 4\n* 2")
+        assert result == 11
+    
     def test_empty_expression(self):
         """Test empty expression returns 0"""
         result = self.calculator.calculate("")
@@ -77,3 +82,40 @@ class TestCalculator:
         """Test invalid expression raises ValueError"""
         with pytest.raises(ValueError):
             self.calculator.calculate("3++4")
+    
+    def test_left_associativity(self):
+        """Test operators of equal precedence are applied left to right"""
+        assert self.calculator.calculate("8-3-2") == 3
+        assert self.calculator.calculate("8/4/2") == 1
+    
+    def test_mismatched_parentheses(self):
+        """Test unbalanced parentheses raise ValueError"""
+        with pytest.raises(ValueError):
+            self.calculator.calculate("(3+4")
+        with pytest.raises(ValueError):
+            self.calculator.calculate("3+4)")
+    
+    def test_missing_operand(self):
+        """Test a trailing operator raises ValueError"""
+        with pytest.raises(ValueError):
+            self.calculator.calculate("3+")
+    
+    def test_unknown_character(self):
+        """Test characters outside the grammar raise ValueError"""
+        with pytest.raises(ValueError):
+            self.calculator.calculate("3x+4")
+        with pytest.raises(ValueError):
+            self.calculator.calculate("\u00e9+1")
+    
+    def test_invalid_number_format(self):
+        """Test malformed numbers raise ValueError"""
+        for expression in (".", "1..2", "1.2.3+4"):
+            with pytest.raises(ValueError):
+                self.calculator.calculate(expression)
+    
+    def test_deeply_nested_parentheses(self):
+        """Test nesting depth is not limited by Python's recursion limit"""
+        assert self.calculator.calculate("(" * 5000 + "2" + ")" * 5000) == 2
+        assert self.calculator.calculate("(" * 5000 + "1+2" + ")" * 5000 + "*3") == 9
+        with pytest.raises(ValueError):
+            self.calculator.calculate("(" * 5000 + "1" + ")" * 4999)